@@ -167,13 +167,12 @@ class BufferLayout:
         return ret
 
     def get_numpy_type(self) -> DTypeLike:
-        dtype = numpy.dtype([])
-        for semantic in self.semantics:
-            dtype = numpy.dtype(
-                dtype.descr
-                + [(semantic.abstract.get_name(), (semantic.get_numpy_type()))]
-            )
-        return dtype
+        return numpy.dtype(
+            [
+                (semantic.abstract.get_name(), semantic.get_numpy_type())
+                for semantic in self.semantics
+            ]
+        )
 
 
 class NumpyBuffer:
@@ -210,13 +209,6 @@ class NumpyBuffer:
     def get_field(self, field: str) -> NDArray:
         return self.data[field]
 
-    def remove_duplicates(self, keep_order=True) -> None:
-        if keep_order:
-            _, unique_index = numpy.unique(self.data, return_index=True)
-            self.data = self.data[numpy.sort(unique_index)]
-        else:
-            self.data = numpy.unique(self.data)
-
     def import_semantic_data(
         self,
         data: NDArray,
@@ -272,8 +264,7 @@ class NumpyBuffer:
 
     def to_file(self, file: Path) -> None:
         """Writes the buffer to a file in the specified format"""
-        with open(file, "wb", encoding="utf-8") as f:
-            f.write(self.get_bytes())
+        self.data.tofile(file)
 
     def append(self, other: "NumpyBuffer") -> None:
         """Appends another NumpyBuffer to this one"""
@@ -283,8 +274,51 @@ class NumpyBuffer:
             other.data if len(self.data) == 0 else numpy.append(self.data, other.data)
         )
 
+    def extend(self, others: list["NumpyBuffer"]) -> None:
+        """Appends several NumpyBuffers to this one with a single concatenation"""
+        for other in others:
+            if self.layout != other.layout:
+                raise ValueError("Layouts do not match!")
+        arrays = [data for data in [self.data] + [o.data for o in others] if len(data)]
+        if len(arrays) == 1:
+            self.data = arrays[0]
+        elif len(arrays) > 1:
+            self.data = numpy.concatenate(arrays)
+
     def copy(self) -> "NumpyBuffer":
         """Returns a copy of the buffer"""
         new_buffer: NumpyBuffer = NumpyBuffer(self.layout)
         new_buffer.data = self.data.copy()
         return new_buffer
+
+
+def unique_rows(data: NDArray) -> tuple[NDArray, NDArray]:
+    """Find rows of the array with exactly the same values, -0.0 and 0.0 count as equal.
+    Returns index of the first row of every unique row in order of appearance, and
+    the unique row number of every row, also numbered in order of appearance."""
+    keys = numpy.ascontiguousarray(data).reshape(
+        len(data), int(numpy.prod(data.shape[1:]))
+    )
+    # Adding zero turns -0.0 into 0.0, they are equal values with different bytes
+    if keys.dtype.names is not None:
+        float_fields = [
+            name
+            for name in keys.dtype.names
+            if keys.dtype.fields[name][0].base.kind == "f"
+        ]
+        if float_fields:
+            keys = keys.copy()
+            for name in float_fields:
+                keys[name] += 0.0
+    elif keys.dtype.kind == "f":
+        keys = keys + 0.0
+    # View every row as one opaque key, so equal rows are found with one flat sort
+    row_keys = keys.view(numpy.dtype((numpy.void, keys.itemsize * keys.shape[1])))
+    _, first_index, inverse = numpy.unique(
+        row_keys.ravel(), return_index=True, return_inverse=True
+    )
+    # numpy.unique numbers rows in sorted order, renumber them by first appearance
+    order = numpy.argsort(first_index)
+    rank = numpy.empty_like(order)
+    rank[order] = numpy.arange(len(order))
+    return first_index[order], rank[inverse.ravel()]
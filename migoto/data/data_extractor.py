@@ -1,12 +1,11 @@
-import collections
 import copy
+import itertools
 import numpy
 from numpy.typing import NDArray, DTypeLike
 import time
 from bpy.types import Mesh, Object
 
 from typing import Optional, Callable
-from operator import attrgetter
 
 from .byte_buffer import (
     AbstractSemantic,
@@ -14,6 +13,7 @@ from .byte_buffer import (
     BufferSemantic,
     NumpyBuffer,
     BufferLayout,
+    unique_rows,
 )
 from .dxgi_format import DXGIFormat, DXGIType
 
@@ -239,37 +239,25 @@ class BlenderDataExtractor:
 
         # Swap every first with every third vertex for every face aka polygon
         if flip_winding:
-            # Create array from 0 to len, it's >10x faster than quering it from Blender via
-            # `indices = self.fetch_data(mesh.loops, 'index', (numpy.uint32, 3), int(size/3))`
-            # Creates [0, 1, 2, 3, 4, 5] for len=6
-            indices = numpy.arange(len(loop_data.data))
-            # Convert flat array to 2-dim array of index triads
+            # View loop data as triads without copying, reshape of contiguous array is free
             # [0, 1, 2, 3, 4, 5] -> [[0, 1, 2], [3, 4, 5]]
-            indices = indices.reshape(-1, 3)
-            # Swap every first with every third element of index triads
+            triangles = loop_data.data.reshape(-1, 3)
+            # Swap every first with every third element of loop data triads in-place
             # [[0, 1, 2], [3, 4, 5]] -> [[2, 1, 0], [5, 4, 3]]
-            indices[:, [0, 2]] = indices[:, [2, 0]]
-            # Destroy first dimension so we could use the array as index for loop data array
-            # [[2, 1, 0], [5, 4, 3]] -> [2, 1, 0, 5, 4, 3]
-            indices = indices.flatten()
-            # Swap every first with every third element of loop data array
-            loop_data.data = loop_data.data[indices]
+            triangles[:, [0, 2]] = triangles[:, [2, 0]]
 
         # Build IB
         index_data = None
         index_semantic = proxy_layout.get_element(AbstractSemantic(Semantic.Index))
-        if index_semantic is not None:
-            indexed_vertices = collections.OrderedDict()
+        if index_semantic is not None or dedupe:
+            # Vertices with exactly the same attributes share one index
             # Note: foreach_get provides loop data in the same order as iteration over polygons
-            index_data = [
-                indexed_vertices.setdefault(data.tobytes(), len(indexed_vertices))
-                for data in loop_data.data
-            ]
-            index_data = numpy.array(index_data, dtype=index_semantic.get_numpy_type())
-
-        # Remove vertices with the exactly same attributes
-        if dedupe:
-            loop_data.remove_duplicates()
+            first_index, loop_index = unique_rows(loop_data.data)
+            if index_semantic is not None:
+                index_data = loop_index.astype(index_semantic.get_numpy_type())
+            # Remove vertices with the exactly same attributes
+            if dedupe:
+                loop_data.set_data(loop_data.data[first_index])
 
         print(
             f"Loop data fetch time: {time.time() - start_time:.3f}s ({len(loop_data.get_data())} vertices, {len(index_data)} indices)"
@@ -293,16 +281,13 @@ class BlenderDataExtractor:
         # Initialize vertex data storage
         size = len(mesh.vertices)
         vertex_data = NumpyBuffer(layout, size=size)
-        vertex_groups = []
+        blends = None
         for buffer_semantic in proxy_layout.semantics:
             if buffer_semantic.abstract.enum in [
                 Semantic.Blendindices,
                 Semantic.Blendweight,
             ]:
-                vertex_groups = [
-                    sorted(vertex.groups, key=attrgetter("weight"), reverse=True)
-                    for vertex in mesh.vertices
-                ]
+                blends = self.get_sorted_blends(mesh)
                 break
 
         # Fetch data for requested semantics
@@ -317,27 +302,13 @@ class BlenderDataExtractor:
                     numpy_type[0] if isinstance(numpy_type, tuple) else numpy_type
                 )
                 num_vgs: int = buffer_semantic.get_num_values()
-                data = numpy.array(
-                    [
-                        [vg.group for vg in groups[:num_vgs]]
-                        + [0] * (num_vgs - len(groups))
-                        for groups in vertex_groups
-                    ],
-                    dtype=dtype,
-                )
+                data = self.scatter_blends(blends, "group", num_vgs, size, dtype)
             elif semantic == Semantic.Blendweight:
                 dtype: DTypeLike = (
                     numpy_type[0] if isinstance(numpy_type, tuple) else numpy_type
                 )
                 num_vgs: int = buffer_semantic.get_num_values()
-                data = numpy.array(
-                    [
-                        [vg.weight for vg in groups[:num_vgs]]
-                        + [0] * (num_vgs - len(groups))
-                        for groups in vertex_groups
-                    ],
-                    dtype=dtype,
-                )
+                data = self.scatter_blends(blends, "weight", num_vgs, size, dtype)
             else:
                 continue
             self.sanitize_blender_data(data)
@@ -351,6 +322,58 @@ class BlenderDataExtractor:
 
         return vertex_data
 
+    @staticmethod
+    def get_sorted_blends(mesh: Mesh) -> dict[str, NDArray]:
+        """Collect vertex group assignments of all vertices as flat arrays,
+        ordered by vertex and then by weight from highest to lowest"""
+        counts = numpy.fromiter(
+            (len(vertex.groups) for vertex in mesh.vertices),
+            dtype=numpy.int64,
+            count=len(mesh.vertices),
+        )
+        total = int(counts.sum())
+        groups = numpy.fromiter(
+            itertools.chain.from_iterable(
+                (vg.group for vg in vertex.groups) for vertex in mesh.vertices
+            ),
+            dtype=numpy.uint32,
+            count=total,
+        )
+        weights = numpy.fromiter(
+            itertools.chain.from_iterable(
+                (vg.weight for vg in vertex.groups) for vertex in mesh.vertices
+            ),
+            dtype=numpy.float32,
+            count=total,
+        )
+        vertex_ids = numpy.repeat(numpy.arange(len(counts)), counts)
+        # Stable sort keeps the original order of equal weights, same as sorted(reverse=True)
+        order = numpy.lexsort((-weights, vertex_ids))
+        # Position of every assignment within its vertex after sorting
+        slots = numpy.arange(total) - numpy.repeat(
+            numpy.cumsum(counts) - counts, counts
+        )
+        return {
+            "vertex": vertex_ids[order],
+            "slot": slots,
+            "group": groups[order],
+            "weight": weights[order],
+        }
+
+    @staticmethod
+    def scatter_blends(
+        blends: dict[str, NDArray],
+        field: str,
+        num_vgs: int,
+        size: int,
+        dtype: DTypeLike,
+    ) -> NDArray:
+        """Place the top num_vgs sorted blend values of every vertex into a zero padded (size, num_vgs) array"""
+        data = numpy.zeros((size, num_vgs), dtype=dtype)
+        mask = blends["slot"] < num_vgs
+        data[blends["vertex"][mask], blends["slot"][mask]] = blends[field][mask]
+        return data
+
     def get_shapekey_data(
         self,
         obj: Object,
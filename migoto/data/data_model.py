@@ -396,23 +396,12 @@ class DataModel(object):
 
     @staticmethod
     def converter_rgb_to_bgr_vector(data: NDArray) -> NDArray:
-        data = data.flatten()
-        # Create array from 0 to len
-        # Creates [0, 1, 2, 3, 4, 5] for len=6
-        indices = numpy.arange(len(data))
-        # Convert flat array to 2-dim array of index triads
+        # Convert flat array to 2-dim array of index triads, copy only once to keep input intact
         # [0, 1, 2, 3, 4, 5] -> [[0, 1, 2], [3, 4, 5]]
-        indices = indices.reshape(-1, 3)
-        # Swap every first with every third element of index triads
+        data = data.reshape(-1, 3).copy()
+        # Swap every first with every third element of index triads in-place
         # [[0, 1, 2], [3, 4, 5]] -> [[2, 1, 0], [5, 4, 3]]
-        indices[:, [0, 2]] = indices[:, [2, 0]]
-        # Destroy first dimension so we could use the array as index for loop data array
-        # [[2, 1, 0], [5, 4, 3]] -> [2, 1, 0, 5, 4, 3]
-        indices = indices.flatten()
-        # Swap every first with every third element of loop data array
-        data = data[indices]
-
-        data = data.reshape(-1, 3)
+        data[:, [0, 2]] = data[:, [2, 0]]
 
         return data
 
@@ -2,7 +2,7 @@ import numpy
 from enum import Enum
 from typing import Callable
 
-from numpy.typing import DTypeLike
+from numpy.typing import DTypeLike, NDArray
 
 
 class Topology(str, Enum):
@@ -24,6 +24,13 @@ class Topology(str, Enum):
             return Topology.UNSOPORTED
 
 
+def quantize(data: NDArray, scale: float, dtype: DTypeLike) -> NDArray:
+    """Scale normalized float data and round it to the integer type, in a single temporary"""
+    result = numpy.multiply(data, scale)
+    numpy.rint(result, out=result)
+    return result.astype(dtype)
+
+
 class DXGIType(Enum):
     # dxgi_type.value = (numpy_type, list_encoder, list_decoder, type_encoder, type_decoder)
     FLOAT32 = (numpy.float32, None, None, None, None)
@@ -38,28 +45,28 @@ class DXGIType(Enum):
         numpy.uint16,
         lambda data: numpy.fromiter(data, numpy.float32),
         None,
-        lambda data: numpy.around(data * 65535.0).astype(numpy.uint16),
+        lambda data: quantize(data, 65535.0, numpy.uint16),
         lambda data: data / 65535.0,
     )
     UNORM8 = (
         numpy.uint8,
         lambda data: numpy.fromiter(data, numpy.float32),
         None,
-        lambda data: numpy.around(data * 255.0).astype(numpy.uint8),
+        lambda data: quantize(data, 255.0, numpy.uint8),
         lambda data: data / 255.0,
     )
     SNORM16 = (
         numpy.int16,
         lambda data: numpy.fromiter(data, numpy.float32),
         None,
-        lambda data: numpy.around(data * 32767.0).astype(numpy.int16),
+        lambda data: quantize(data, 32767.0, numpy.int16),
         lambda data: data / 32767.0,
     )
     SNORM8 = (
         numpy.int8,
         lambda data: numpy.fromiter(data, numpy.float32),
         None,
-        lambda data: numpy.around(data * 127.0).astype(numpy.int8),
+        lambda data: quantize(data, 127.0, numpy.int8),
         lambda data: data / 127.0,
     )
 
@@ -6,6 +6,7 @@ from pathlib import Path
 
 import bmesh
 import bpy
+import numpy
 from bpy.types import Context, Mesh, Object, Operator
 from bpy_extras.io_utils import axis_conversion
 from mathutils import Vector
@@ -87,6 +88,11 @@ def assert_pointlist_ib_is_pointless(ib: IndexBuffer, vb: VertexBufferGroup):
 
 # from export_obj:
 def mesh_triangulate(me: Mesh):
+    # Already triangulated meshes (rips, Triangulate modifier) skip the bmesh round-trip
+    loop_totals = numpy.empty(len(me.polygons), dtype=numpy.int32)
+    me.polygons.foreach_get("loop_total", loop_totals)
+    if numpy.all(loop_totals == 3):
+        return
     bm = bmesh.new()
     bm.from_mesh(me)
     bmesh.ops.triangulate(bm, faces=bm.faces)
@@ -184,7 +190,8 @@ def apply_vgmap(
     if not targets:
         raise Fatal("No object selected")
 
-    vgmap = json.load(open(filepath, "r"))
+    with open(filepath, "r", encoding="utf-8") as f:
+        vgmap = json.load(f)
 
     if reverse:
         vgmap = {int(v): int(k) for k, v in vgmap.items()}
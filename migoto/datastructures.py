@@ -2,7 +2,6 @@ import collections
 import io
 import itertools
 import re
-import struct
 import textwrap
 from enum import Enum
 import numpy
@@ -71,7 +70,7 @@ misc_int_pattern = re.compile(r"""(?:DXGI_FORMAT_)?(?:[RGBAD][0-9]+)+_[SU]INT"""
 def EncoderDecoder(fmt):
     if f32_pattern.match(fmt):
         return (
-            lambda data: b"".join(struct.pack("<f", x) for x in data),
+            lambda data: numpy.fromiter(data, numpy.float32).tobytes(),
             lambda data: numpy.frombuffer(data, numpy.float32).tolist(),
         )
     if f16_pattern.match(fmt):
@@ -450,13 +449,6 @@ class InputLayout(object):
         return semantic_translations
 
 
-class HashableVertex(dict):
-    def __hash__(self):
-        # Convert keys and values into immutable types that can be hashed
-        immutable = tuple((k, tuple(v)) for k, v in sorted(self.items()))
-        return hash(immutable)
-
-
 class IndividualVertexBuffer(object):
     """
     One individual vertex buffer. Multiple vertex buffers may contain
@@ -487,21 +479,21 @@ class IndividualVertexBuffer(object):
             # print(line)
             if line.startswith("byte offset:"):
                 self.offset = int(line[13:])
-            if line.startswith("first vertex:"):
+            elif line.startswith("first vertex:"):
                 self.first = int(line[14:])
-            if line.startswith("vertex count:"):
+            elif line.startswith("vertex count:"):
                 self.vertex_count = int(line[14:])
-            if line.startswith("stride:"):
+            elif line.startswith("stride:"):
                 self.stride = int(line[7:])
-            if line.startswith(split_vb_stride):
+            elif line.startswith(split_vb_stride):
                 self.stride = int(line[len(split_vb_stride) :])
-            if line.startswith("element["):
+            elif line.startswith("element["):
                 self.layout.parse_element(f)
-            if line.startswith("topology:"):
+            elif line.startswith("topology:"):
                 self.topology = line[10:]
                 if self.topology not in supported_topologies:
                     raise Fatal('"%s" is not yet supported' % line)
-            if line.startswith("vertex-data:"):
+            elif line.startswith("vertex-data:"):
                 if not load_vertices:
                     return
                 self.parse_vertex_data(f)
@@ -517,13 +509,24 @@ class IndividualVertexBuffer(object):
             f.seek(self.first * self.stride, 1)
         else:
             self.first = 0
-        for i in itertools.count():
-            if use_drawcall_range and i == self.vertex_count:
-                break
-            vertex = f.read(self.stride)
-            if not vertex:
-                break
-            self.vertices.append(self.layout.decode(vertex, self.idx))
+        if self.stride <= 0:
+            raise Fatal(
+                "Invalid vertex buffer stride %i for %s" % (self.stride, f.name)
+            )
+        # Read the whole range at once and decode vertices from views into it,
+        # rather than issuing a separate read for every vertex
+        data = memoryview(
+            f.read(self.vertex_count * self.stride) if use_drawcall_range else f.read()
+        )
+        if len(data) % self.stride:
+            raise Fatal(
+                "Vertex buffer %s is truncated: %i bytes is not a multiple of the %i byte stride"
+                % (f.name, len(data), self.stride)
+            )
+        for offset in range(0, len(data), self.stride):
+            self.vertices.append(
+                self.layout.decode(data[offset : offset + self.stride], self.idx)
+            )
         # We intentionally disregard the vertex count when loading from a
         # binary file, as we assume frame analysis might have only dumped a
         # partial buffer to the .txt files (e.g. if this was from a dump where
@@ -538,6 +541,8 @@ class IndividualVertexBuffer(object):
 
     def parse_vertex_data(self, f):
         vertex = {}
+        # Value parser of every semantic, resolved on its first line instead of every line
+        value_parsers = {}
         for line in map(str.strip, f):
             # print(line)
             if line.startswith("instance-data:"):
@@ -545,7 +550,15 @@ class IndividualVertexBuffer(object):
 
             match = self.vb_elem_pattern.match(line)
             if match:
-                vertex[match.group("semantic")] = self.parse_vertex_element(match)
+                semantic = match.group("semantic")
+                value_parser = value_parsers.get(semantic)
+                if value_parser is None:
+                    value_parser = value_parsers[semantic] = self.get_value_parser(
+                        semantic
+                    )
+                vertex[semantic] = tuple(
+                    map(value_parser, match.group("data").split(","))
+                )
             elif line == "" and vertex:
                 self.vertices.append(vertex)
                 vertex = {}
@@ -565,13 +578,11 @@ class IndividualVertexBuffer(object):
             return -numpy.nan  # so must use unary - operator
         return numpy.nan
 
-    def parse_vertex_element(self, match):
-        fields = match.group("data").split(",")
+    def get_value_parser(self, semantic):
+        if self.layout[semantic].Format.endswith("INT"):
+            return int
 
-        if self.layout[match.group("semantic")].Format.endswith("INT"):
-            return tuple(map(int, fields))
-
-        return tuple(map(self.ms_float, fields))
+        return self.ms_float
 
 
 class VertexBufferGroup(object):
@@ -675,11 +686,47 @@ class VertexBufferGroup(object):
                 if semantic.startswith("BLENDINDICES"):
                     vertex[semantic] = (0, 0, 0, 0)
 
-    def write(self, output_prefix, strides, operator=None):
-        for vbuf_idx, stride in strides.items():
+    def encode(self, strides):
+        # Join encoded vertices of every buffer slot into one pre-sized buffer
+        return {
+            vbuf_idx: bytearray(
+                b"".join(
+                    self.layout.encode(vertex, vbuf_idx, stride)
+                    for vertex in self.vertices
+                )
+            )
+            for vbuf_idx, stride in strides.items()
+        }
+
+    def encode_blendindices(self, encoded, strides):
+        # Re-encode only the BLENDINDICES of already encoded buffers, they are
+        # the only elements that differ between VGMap remaps
+        if not self.vertices:
+            return
+        for semantic in self.vertices[0]:
+            if not semantic.startswith("BLENDINDICES"):
+                continue
+            elem = self.layout.elems[semantic]
+            values = b"".join(elem.encode(vertex[semantic]) for vertex in self.vertices)
+            values = numpy.frombuffer(values, numpy.uint8).reshape(
+                len(self.vertices), -1
+            )
+            for vbuf_idx, stride in strides.items():
+                if vbuf_idx.isnumeric() and elem.InputSlot != int(vbuf_idx):
+                    # Belongs to a different vertex buffer
+                    continue
+                data = numpy.frombuffer(encoded[vbuf_idx], numpy.uint8).reshape(
+                    -1, stride
+                )
+                offset = elem.AlignedByteOffset
+                data[:, offset : offset + values.shape[1]] = values
+
+    def write(self, output_prefix, strides, operator=None, encoded=None):
+        if encoded is None:
+            encoded = self.encode(strides)
+        for vbuf_idx in strides:
             with open(str(output_prefix) + str(vbuf_idx), "wb") as output:
-                for vertex in self.vertices:
-                    output.write(self.layout.encode(vertex, vbuf_idx, stride))
+                output.write(encoded[vbuf_idx])
 
                 msg = "Wrote %i vertices to %s" % (len(self), output.name)
                 if operator:
@@ -846,23 +893,24 @@ class IndexBuffer(object):
     def parse_ib_bin(self, f, use_drawcall_range=False):
         f.seek(self.offset)
         stride = format_size(self.format)
+        if stride <= 0:
+            raise Fatal("Invalid index buffer format %s for %s" % (self.format, f.name))
         if use_drawcall_range:
             f.seek(self.first * stride, 1)
         else:
             self.first = 0
 
-        face = []
-        for i in itertools.count():
-            if use_drawcall_range and i == self.index_count:
-                break
-            index = f.read(stride)
-            if not index:
-                break
-            face.append(*self.decoder(index))
-            if len(face) == self.indices_per_face:
-                self.faces.append(tuple(face))
-                face = []
-        assert len(face) == 0, "Index buffer has incomplete face at end of file"
+        # Decode the whole range in one go instead of one index at a time
+        data = f.read(self.index_count * stride) if use_drawcall_range else f.read()
+        if len(data) % stride:
+            raise Fatal(
+                "Index buffer %s is truncated: %i bytes is not a multiple of the %i byte index size"
+                % (f.name, len(data), stride)
+            )
+        indices = self.decoder(data)
+        incomplete = len(indices) % self.indices_per_face
+        assert not incomplete, "Index buffer has incomplete face at end of file"
+        self.faces.extend(zip(*[iter(indices)] * self.indices_per_face))
         self.expand_strips()
 
         if use_drawcall_range:
@@ -917,8 +965,8 @@ class IndexBuffer(object):
         self.faces.extend(other.faces)
 
     def write(self, output, operator=None):
-        for face in self.faces:
-            output.write(self.encoder(face))
+        # Encode the whole buffer in one go rather than one face at a time
+        output.write(self.encoder(itertools.chain.from_iterable(self.faces)))
 
         msg = "Wrote %i indices to %s" % (len(self), output.name)
         if operator:
@@ -1,8 +1,9 @@
-import collections
 import json
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy
 from pathlib import Path
-from typing import Callable
+from typing import Optional
 import textwrap
 import shutil
 import bpy
@@ -19,7 +20,9 @@ from .data.byte_buffer import (
     AbstractSemantic,
     BufferLayout,
     Semantic,
+    unique_rows,
 )
+from .data.data_extractor import BlenderDataExtractor
 from .data.dxgi_format import DXGIType
 from .datahandling import (
     Fatal,
@@ -29,20 +32,21 @@ from .datahandling import (
     mesh_triangulate,
 )
 from .datastructures import (
+    EncoderDecoder,
     GameEnum,
-    HashableVertex,
     IndexBuffer,
     InputLayout,
     VertexBufferGroup,
     game_enum,
 )
-from .exporter import ModExporter
+from .exporter import ModExporter, orjson
 
 
 
 def normal_export_translation(
     layouts: list[BufferLayout], semantic: Semantic, flip: bool
-) -> Callable:
+) -> tuple[float, float]:
+    """Get (scale, bias) translating normal components to their export range as x * scale + bias"""
     unorm = False
     for layout in layouts:
         # Ensure layout is iterable; if not, wrap it in a list
@@ -57,14 +61,11 @@ def normal_export_translation(
                     break
         if unorm:
             break
+    sign = -1.0 if flip else 1.0
     if unorm:
         # Scale normal range -1:+1 to UNORM range 0:+1
-        if flip:
-            return lambda x: -x / 2.0 + 0.5
-        return lambda x: x / 2.0 + 0.5
-    if flip:
-        return lambda x: -x
-    return lambda x: x
+        return sign * 0.5, 0.5
+    return sign, 0.0
 
 def apply_modifiers_and_shapekeys(context: Context, obj: Object) -> Mesh:
     """Apply all modifiers to a mesh with shapekeys. Preserves shapekeys named Deform"""
@@ -94,36 +95,11 @@ def apply_modifiers_and_shapekeys(context: Context, obj: Object) -> Mesh:
         list_properties = []
         vert_count = -1
         bpy.ops.object.select_all(action="DESELECT")
-        result_obj.select_set(True)
-        bpy.ops.object.duplicate_move(
-            OBJECT_OT_duplicate={"linked": False, "mode": "TRANSLATION"},
-            TRANSFORM_OT_translate={
-                "value": (0, 0, 0),
-                "orient_type": "GLOBAL",
-                "orient_matrix": ((1, 0, 0), (0, 1, 0), (0, 0, 1)),
-                "orient_matrix_type": "GLOBAL",
-                "constraint_axis": (False, False, False),
-                "mirror": True,
-                "use_proportional_edit": False,
-                "proportional_edit_falloff": "SMOOTH",
-                "proportional_size": 1,
-                "use_proportional_connected": False,
-                "use_proportional_projected": False,
-                "snap": False,
-                "snap_target": "CLOSEST",
-                "snap_point": (0, 0, 0),
-                "snap_align": False,
-                "snap_normal": (0, 0, 0),
-                "gpencil_strokes": False,
-                "cursor_transform": False,
-                "texture_space": False,
-                "remove_on_cancel": False,
-                "release_confirm": False,
-                "use_accurate": False,
-            },
-        )
-        copy_obj = context.view_layer.objects.active
-        copy_obj.select_set(False)
+        # Duplicate through the data API, duplicate_move would trigger a full
+        # depsgraph update, redraw and undo push
+        copy_obj = result_obj.copy()
+        copy_obj.data = result_obj.data.copy()
+        context.collection.objects.link(copy_obj)
         context.view_layer.objects.active = result_obj
         result_obj.select_set(True)
         # Store key shape properties
@@ -148,39 +124,13 @@ def apply_modifiers_and_shapekeys(context: Context, obj: Object) -> Mesh:
         vert_count = len(result_obj.data.vertices)
         result_obj.select_set(False)
         # Create a temp object to apply modifiers into once per SK
-        for i in range(1, obj.data.shape_keys.key_blocks):
-            context.view_layer.objects.active = copy_obj
-            copy_obj.select_set(True)
-            bpy.ops.object.duplicate_move(
-                OBJECT_OT_duplicate={"linked": False, "mode": "TRANSLATION"},
-                TRANSFORM_OT_translate={
-                    "value": (0, 0, 0),
-                    "orient_type": "GLOBAL",
-                    "orient_matrix": ((1, 0, 0), (0, 1, 0), (0, 0, 1)),
-                    "orient_matrix_type": "GLOBAL",
-                    "constraint_axis": (False, False, False),
-                    "mirror": True,
-                    "use_proportional_edit": False,
-                    "proportional_edit_falloff": "SMOOTH",
-                    "proportional_size": 1,
-                    "use_proportional_connected": False,
-                    "use_proportional_projected": False,
-                    "snap": False,
-                    "snap_target": "CLOSEST",
-                    "snap_point": (0, 0, 0),
-                    "snap_align": False,
-                    "snap_normal": (0, 0, 0),
-                    "gpencil_strokes": False,
-                    "cursor_transform": False,
-                    "texture_space": False,
-                    "remove_on_cancel": False,
-                    "release_confirm": False,
-                    "use_accurate": False,
-                },
-            )
-            temp_obj = context.view_layer.objects.active
-            for k in temp_obj.data.shape_keys.key_blocks:
-                temp_obj.shape_key_remove(k)
+        for i in range(1, len(obj.data.shape_keys.key_blocks)):
+            temp_obj = copy_obj.copy()
+            temp_obj.data = copy_obj.data.copy()
+            context.collection.objects.link(temp_obj)
+            temp_obj.shape_key_clear()
+            context.view_layer.objects.active = temp_obj
+            temp_obj.select_set(True)
 
             copy_obj.select_set(True)
             copy_obj.active_shape_key_index = i
@@ -188,7 +138,7 @@ def apply_modifiers_and_shapekeys(context: Context, obj: Object) -> Mesh:
             bpy.ops.object.shape_key_transfer(use_clamp=True)
             context.object.active_shape_key_index = 0
             bpy.ops.object.shape_key_remove()
-            bpy.ops.object.shape_key_remove(all=True)
+            temp_obj.shape_key_clear()
             for mod in modifiers_to_apply:
                 bpy.ops.object.modifier_apply(modifier=mod.name)
             if vert_count != len(temp_obj.data.vertices):
@@ -200,11 +150,12 @@ def apply_modifiers_and_shapekeys(context: Context, obj: Object) -> Mesh:
             result_obj.select_set(True)
             bpy.ops.object.join_shapes()
             result_obj.select_set(False)
-            context.view_layer.objects.active = temp_obj
-            bpy.ops.object.delete(use_global=False)
+            temp_mesh = temp_obj.data
+            bpy.data.objects.remove(temp_obj, do_unlink=True)
+            bpy.data.meshes.remove(temp_mesh)
         # Restore shape key properties like name, mute etc.
         context.view_layer.objects.active = result_obj
-        for i in range(0, obj.data.shape_keys.key_blocks):
+        for i in range(0, len(obj.data.shape_keys.key_blocks)):
             key_b = context.view_layer.objects.active.data.shape_keys.key_blocks[i]
             key_b.name = list_properties[i]["name"]
             key_b.interpolation = list_properties[i]["interpolation"]
@@ -215,7 +166,7 @@ def apply_modifiers_and_shapekeys(context: Context, obj: Object) -> Mesh:
             key_b.vertex_group = list_properties[i]["vertex_group"]
             rel_key = list_properties[i]["relative_key"]
 
-            for j in range(0, obj.data.shape_keys.key_blocks):
+            for j in range(0, len(obj.data.shape_keys.key_blocks)):
                 key_brel = context.view_layer.objects.active.data.shape_keys.key_blocks[
                     j
                 ]
@@ -224,9 +175,9 @@ def apply_modifiers_and_shapekeys(context: Context, obj: Object) -> Mesh:
                     break
             context.view_layer.objects.active.data.update()
         result_obj.select_set(False)
-        context.view_layer.objects.active = copy_obj
-        copy_obj.select_set(True)
-        bpy.ops.object.delete(use_global=False)
+        copy_mesh = copy_obj.data
+        bpy.data.objects.remove(copy_obj, do_unlink=True)
+        bpy.data.meshes.remove(copy_mesh)
         bpy.ops.object.select_all(action="DESELECT")
         context.view_layer.objects.active = result_obj
         context.view_layer.objects.active.select_set(True)
@@ -368,6 +319,11 @@ class Export3DMigoto(Operator, ExportHelper):
         default="*.vb*",
         options={"HIDDEN"},
     )
+    compress_indices: BoolProperty(
+        name="16-bit indices when possible",
+        description="Writes a 32-bit index buffer as DXGI_FORMAT_R16_UINT when every index fits. The ini resource of the IB must declare the same format",
+        default=False,
+    )
 
     def invoke(self, context, event):
         return ExportHelper.invoke(self, context, event)
@@ -375,10 +331,10 @@ class Export3DMigoto(Operator, ExportHelper):
     def execute(self, context):
         try:
             file_path = Path(self.filepath)
-            vb_path = file_path.parent / (file_path.stem + ".vb")
-            ib_path = file_path.parent / (file_path.stem + ".ib")
-            fmt_path = file_path.parent / (file_path.stem + ".fmt")
-            ini_path = file_path.parent / (file_path.stem + "_generated.ini")
+            vb_path = file_path.with_suffix(".vb")
+            ib_path = file_path.with_suffix(".ib")
+            fmt_path = file_path.with_suffix(".fmt")
+            ini_path = file_path.with_name(file_path.stem + "_generated.ini")
             obj = context.object
             self.flip_normal = obj.get("3DMigoto:FlipNormal", False)
             self.flip_tangent = obj.get("3DMigoto:FlipTangent", False)
@@ -569,8 +525,6 @@ class ExportAdvancedOperator(Operator):
     def execute(self, context):
         scene = bpy.context.scene
         xxmi: XXMIProperties = scene.xxmi
-        if not xxmi.use_custom_template:
-            xxmi.template_path = ""
         try:
             if xxmi.game == "":
                 self.report(
@@ -578,33 +532,39 @@ class ExportAdvancedOperator(Operator):
                     "Please select a valid game before continuing.",
                 )
                 return {"CANCELLED"}
-            mod_exporter: ModExporter = ModExporter(
-                context=context,
-                operator=self,
-                dump_path=Path(xxmi.dump_path),
-                destination=Path(xxmi.destination_path),
-                game=GameEnum[xxmi.game],
-                ignore_hidden=xxmi.ignore_hidden,
-                only_selected=xxmi.only_selected,
-                no_ramps=xxmi.no_ramps,
-                copy_textures=xxmi.copy_textures,
-                ignore_duplicate_textures=xxmi.ignore_duplicate_textures,
-                credit=xxmi.credit,
-                outline_optimization=xxmi.outline_optimization,
-                apply_modifiers=xxmi.apply_modifiers_and_shapekeys,
-                normalize_weights=xxmi.normalize_weights,
-                write_buffers=xxmi.write_buffers,
-                write_ini=xxmi.write_ini,
-                template=Path(xxmi.template_path)
-                if xxmi.use_custom_template != ""
-                else None,
-            )
-            mod_exporter.export()
+            create_mod_exporter(context, self, xxmi).export()
         except Fatal as e:
             self.report({"ERROR"}, str(e))
         return {"FINISHED"}
 
 
+def create_mod_exporter(
+    context: Context, operator: Operator, xxmi: XXMIProperties
+) -> ModExporter:
+    """Create mod exporter from the scene export settings"""
+    if not xxmi.use_custom_template:
+        xxmi.template_path = ""
+    return ModExporter(
+        context=context,
+        operator=operator,
+        dump_path=Path(xxmi.dump_path),
+        destination=Path(xxmi.destination_path),
+        game=GameEnum[xxmi.game],
+        ignore_hidden=xxmi.ignore_hidden,
+        only_selected=xxmi.only_selected,
+        no_ramps=xxmi.no_ramps,
+        copy_textures=xxmi.copy_textures,
+        ignore_duplicate_textures=xxmi.ignore_duplicate_textures,
+        credit=xxmi.credit,
+        outline_optimization=xxmi.outline_optimization,
+        apply_modifiers=xxmi.apply_modifiers_and_shapekeys,
+        normalize_weights=xxmi.normalize_weights,
+        write_buffers=xxmi.write_buffers,
+        write_ini=xxmi.write_ini,
+        template=Path(xxmi.template_path) if xxmi.use_custom_template != "" else None,
+    )
+
+
 class ExportAdvancedBatchedOperator(Operator):
     """Export operation base class"""
 
@@ -633,42 +593,121 @@ class ExportAdvancedBatchedOperator(Operator):
         start_time = time.time()
         base_dir = Path(xxmi.destination_path)
         wildcards = ("#####", "####", "###", "##", "#")
-        try:
-            for frame in range(scene.frame_start, scene.frame_end + 1):
-                context.scene.frame_set(frame)
-                for w in wildcards:
-                    if w in xxmi.batch_pattern:
-                        folder_name = xxmi.batch_pattern.replace(w, str(frame).zfill(len(w)))
-                        break
-                else:
-                    self.report(
-                        {"ERROR"},
-                        "Batch pattern must contain any number of # wildcard characters for the frame number to be written into it. Example name_### -> name_001",
+        if xxmi.game == "":
+            self.report(
+                {"ERROR"},
+                "Please select a valid game before continuing.",
+            )
+            return {"CANCELLED"}
+        # Files of a frame are written on a worker while the next frame is evaluated,
+        # at most one write is kept pending so exported buffers don't pile up in memory
+        pending_write: Optional[tuple[ModExporter, Future]] = None
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            try:
+                for frame in range(scene.frame_start, scene.frame_end + 1):
+                    context.scene.frame_set(frame)
+                    for w in wildcards:
+                        if w in xxmi.batch_pattern:
+                            folder_name = xxmi.batch_pattern.replace(
+                                w, str(frame).zfill(len(w))
+                            )
+                            break
+                    else:
+                        self.report(
+                            {"ERROR"},
+                            "Batch pattern must contain any number of # wildcard characters for the frame number to be written into it. Example name_### -> name_001",
+                        )
+                        return {"CANCELLED"}
+                    frame_folder = Path(folder_name)
+                    xxmi.destination_path = str(base_dir / frame_folder)
+                    try:
+                        mod_exporter = create_mod_exporter(context, self, xxmi)
+                        write = mod_exporter.export(writer)
+                    except Fatal as e:
+                        self.report({"ERROR"}, str(e))
+                        continue
+                    previous_write, pending_write = pending_write, (mod_exporter, write)
+                    self.finish_write(previous_write)
+                    print(
+                        f"Exported frame {frame + 1 - scene.frame_start}/{scene.frame_end + 1 - scene.frame_start}"
                     )
-                    return {"CANCELLED"}
-                frame_folder = Path(folder_name)
-                xxmi.destination_path = str(base_dir / frame_folder)
-                bpy.ops.xxmi.exportadvanced()
-                print(
-                    f"Exported frame {frame + 1 - scene.frame_start}/{scene.frame_end + 1 - scene.frame_start}"
-                )
-            print(f"Batch export took {time.time() - start_time} seconds")
+            finally:
+                self.finish_write(pending_write)
+                xxmi.destination_path = str(base_dir)
+        print(f"Batch export took {time.time() - start_time} seconds")
+        return {"FINISHED"}
+
+    def finish_write(self, pending: Optional[tuple[ModExporter, Future]]) -> None:
+        """Wait for files of the previous frame and report how writing them went"""
+        if pending is None:
+            return
+        mod_exporter, write = pending
+        try:
+            write.result()
         except Fatal as e:
             self.report({"ERROR"}, str(e))
-        xxmi.destination_path = str(base_dir)
-        return {"FINISHED"}
+        except Exception as e:
+            self.report(
+                {"ERROR"},
+                f"Writing {mod_exporter.mod_name} to {mod_exporter.destination} failed: {e}",
+            )
+        else:
+            mod_exporter.report_exported()
 
 
 def write_fmt_file(f, vb: VertexBufferGroup, ib: IndexBuffer, strides: list[int]):
-    for vbuf_idx, stride in strides.items():
-        if vbuf_idx.isnumeric():
-            f.write("vb%s stride: %i\n" % (vbuf_idx, stride))
-        else:
-            f.write("stride: %i\n" % stride)
-    f.write("topology: %s\n" % vb.topology)
+    lines = [
+        (
+            "vb%s stride: %i\n" % (vbuf_idx, stride)
+            if vbuf_idx.isnumeric()
+            else "stride: %i\n" % stride
+        )
+        for vbuf_idx, stride in strides.items()
+    ]
+    lines.append("topology: %s\n" % vb.topology)
     if ib is not None:
-        f.write("format: %s\n" % ib.format)
-    f.write(vb.layout.to_string())
+        lines.append("format: %s\n" % ib.format)
+    lines.append(vb.layout.to_string())
+    f.write("".join(lines))
+
+
+# Dedented once at import instead of on every write_ini_file call
+INI_RESOURCE_IB_TEMPLATE = textwrap.dedent("""
+    [ResourceIB]
+    type = buffer
+    format = {}
+    filename = {}
+    """)
+INI_RESOURCE_VB_TEMPLATE = textwrap.dedent("""
+    [ResourceVB{}]
+    type = buffer
+    stride = {}
+    filename = {}
+    """)
+INI_HEADER_TEMPLATE = textwrap.dedent("""
+    ; Automatically generated file, be careful not to overwrite if you
+    ; make any manual changes
+
+    ; Please note - it is not recommended to place the [ShaderOverride]
+    ; here, as you only want checktextureoverride executed once per
+    ; draw call, so it's better to have all the shaders listed in a
+    ; common file instead to avoid doubling up and to allow common code
+    ; to enable/disable the mods, backup/restore buffers, etc. Plus you
+    ; may need to locate additional shaders to take care of shadows or
+    ; other render passes. But if you understand what you are doing and
+    ; need a quick 'n' dirty way to enable the reinjection, fill this in
+    ; and uncomment it:
+    ;[ShaderOverride{suffix}]
+    ;hash = FILL ME IN...
+    ;checktextureoverride = vb0
+
+    [TextureOverride{suffix}]
+    ;hash = FILL ME IN...
+    """).lstrip()
+INI_TOPOLOGY_OVERRIDE = textwrap.dedent("""
+    [CustomShaderOverrideTopology]
+    topology = triangle_list
+    """)
 
 
 def write_ini_file(
@@ -683,11 +722,12 @@ def write_ini_file(
 ):
     backup = True
     # topology='trianglestrip' # Testing
-    bind_section = ""
-    backup_section = ""
-    restore_section = ""
-    resource_section = ""
-    resource_bak_section = ""
+    # Sections are collected as lists of lines and joined once when written
+    bind_section = []
+    backup_section = []
+    restore_section = []
+    resource_section = []
+    resource_bak_section = []
 
     draw_section = "handling = skip\n"
     if ib is not None:
@@ -696,70 +736,39 @@ def write_ini_file(
         draw_section += "draw = auto\n"
 
     if ib is not None:
-        bind_section += "ib = ResourceIB\n"
-        resource_section += textwrap.dedent("""
-            [ResourceIB]
-            type = buffer
-            format = {}
-            filename = {}
-            """).format(ib.format, ib_path)
+        bind_section.append("ib = ResourceIB\n")
+        resource_section.append(INI_RESOURCE_IB_TEMPLATE.format(ib.format, ib_path))
         if backup:
-            resource_bak_section += "[ResourceBakIB]\n"
-            backup_section += "ResourceBakIB = ref ib\n"
-            restore_section += "ib = ResourceBakIB\n"
+            resource_bak_section.append("[ResourceBakIB]\n")
+            backup_section.append("ResourceBakIB = ref ib\n")
+            restore_section.append("ib = ResourceBakIB\n")
 
     for vbuf_idx, stride in strides.items():
-        bind_section += "vb{0} = ResourceVB{0}\n".format(vbuf_idx or 0)
-        resource_section += textwrap.dedent("""
-            [ResourceVB{}]
-            type = buffer
-            stride = {}
-            filename = {}
-            """).format(vbuf_idx, stride, vb_path + vbuf_idx)
+        bind_section.append("vb{0} = ResourceVB{0}\n".format(vbuf_idx or 0))
+        resource_section.append(
+            INI_RESOURCE_VB_TEMPLATE.format(vbuf_idx, stride, vb_path + vbuf_idx)
+        )
         if backup:
-            resource_bak_section += "[ResourceBakVB{0}]\n".format(vbuf_idx or 0)
-            backup_section += "ResourceBakVB{0} = ref vb{0}\n".format(vbuf_idx or 0)
-            restore_section += "vb{0} = ResourceBakVB{0}\n".format(vbuf_idx or 0)
+            resource_bak_section.append("[ResourceBakVB{0}]\n".format(vbuf_idx or 0))
+            backup_section.append(
+                "ResourceBakVB{0} = ref vb{0}\n".format(vbuf_idx or 0)
+            )
+            restore_section.append("vb{0} = ResourceBakVB{0}\n".format(vbuf_idx or 0))
 
     # FIXME: Maybe split this into several ini files that the user may or may
     # not choose to generate? One that just lists resources, a second that
     # lists the TextureOverrides to replace draw calls, and a third with the
     # ShaderOverride sections (or a ShaderRegex for foolproof replacements)...?
-    f.write(
-        textwrap.dedent("""
-            ; Automatically generated file, be careful not to overwrite if you
-            ; make any manual changes
-
-            ; Please note - it is not recommended to place the [ShaderOverride]
-            ; here, as you only want checktextureoverride executed once per
-            ; draw call, so it's better to have all the shaders listed in a
-            ; common file instead to avoid doubling up and to allow common code
-            ; to enable/disable the mods, backup/restore buffers, etc. Plus you
-            ; may need to locate additional shaders to take care of shadows or
-            ; other render passes. But if you understand what you are doing and
-            ; need a quick 'n' dirty way to enable the reinjection, fill this in
-            ; and uncomment it:
-            ;[ShaderOverride{suffix}]
-            ;hash = FILL ME IN...
-            ;checktextureoverride = vb0
-
-            [TextureOverride{suffix}]
-            ;hash = FILL ME IN...
-            """)
-        .lstrip()
-        .format(
-            suffix="",
-        )
-    )
+    f.write(INI_HEADER_TEMPLATE.format(suffix=""))
     if ib is not None and "3DMigoto:FirstIndex" in obj:
         f.write("match_first_index = {}\n".format(obj["3DMigoto:FirstIndex"]))
     elif ib is None and "3DMigoto:FirstVertex" in obj:
         f.write("match_first_vertex = {}\n".format(obj["3DMigoto:FirstVertex"]))
 
     if backup:
-        f.write(backup_section)
+        f.write("".join(backup_section))
 
-    f.write(bind_section)
+    f.write("".join(bind_section))
 
     if topology == "trianglestrip":
         f.write("run = CustomShaderOverrideTopology\n")
@@ -767,48 +776,52 @@ def write_ini_file(
         f.write(draw_section)
 
     if backup:
-        f.write(restore_section)
+        f.write("".join(restore_section))
 
     if topology == "trianglestrip":
-        f.write(
-            textwrap.dedent("""
-            [CustomShaderOverrideTopology]
-            topology = triangle_list
-            """)
-            + draw_section
-        )
+        f.write(INI_TOPOLOGY_OVERRIDE + draw_section)
 
     if backup:
-        f.write("\n" + resource_bak_section)
-
-    f.write(resource_section)
-
-
-def blender_vertex_to_3dmigoto_vertex(
-    mesh: Mesh,
-    obj: Object,
-    blender_loop_vertex,
-    layout,
-    texcoords,
-    blender_vertex,
-    translate_normal,
-    translate_tangent,
-    export_outline=None,
-):
-    if blender_loop_vertex is not None:
-        blender_vertex = mesh.vertices[blender_loop_vertex.vertex_index]
-    vertex = {}
-    blp_normal = list(blender_loop_vertex.normal)
+        f.write("\n" + "".join(resource_bak_section))
+
+    f.write("".join(resource_section))
+
+
+def fetch_custom_attribute_values(attributes, dtype) -> dict[str, numpy.ndarray]:
+    """Read values of every per-vertex custom attribute layer into numpy arrays with foreach_get"""
+    result = {}
+    for layer_name, attribute in attributes.items():
+        values = numpy.empty(len(attribute.data), dtype=dtype)
+        attribute.data.foreach_get("value", values)
+        result[layer_name] = values
+    return result
+
+
+def fetch_sorted_vertex_groups(mesh: Mesh) -> tuple[list[list], list[list]]:
+    """Get group indices and weights of every vertex, sorted from the highest weight.
+    Assignments are collected in a single pass and sorted for all vertices at once"""
+    blends = BlenderDataExtractor.get_sorted_blends(mesh)
+    ends = numpy.cumsum(
+        numpy.bincount(blends["vertex"], minlength=len(mesh.vertices))
+    ).tolist()
+    starts = [0] + ends[:-1]
+    groups = blends["group"].tolist()
+    weights = blends["weight"].tolist()
+    return (
+        [groups[start:end] for start, end in zip(starts, ends)],
+        [weights[start:end] for start, end in zip(starts, ends)],
+    )
 
-    # TODO: Warn if vertex is in too many vertex groups for this layout,
-    # ignoring groups with weight=0.0
-    vertex_groups = sorted(blender_vertex.groups, key=lambda x: x.weight, reverse=True)
 
+def resolve_layout_elements(layout: InputLayout) -> list[tuple]:
+    """Resolve exported per-vertex elements of the layout to (elem, semantic, index)
+    once, so vertices don't have to remap and match semantic names one by one"""
+    semantic_translations = layout.get_semantic_remap()
+    layout_elements = []
     for elem in layout:
         if elem.InputSlotClass != "per-vertex" or elem.reused_offset:
             continue
 
-        semantic_translations = layout.get_semantic_remap()
         translated_elem_name, translated_elem_index = semantic_translations.get(
             elem.name, (elem.name, elem.SemanticIndex)
         )
@@ -816,133 +829,93 @@ def blender_vertex_to_3dmigoto_vertex(
         # Some games don't follow the official DirectX UPPERCASE semantic naming convention:
         translated_elem_name = translated_elem_name.upper()
 
-        if translated_elem_name == "POSITION":
-            if "POSITION.w" in custom_attributes_float(mesh):
+        if translated_elem_name in ("POSITION", "NORMAL"):
+            semantic = translated_elem_name
+        elif translated_elem_name.startswith("TEXCOORD"):
+            semantic = "TEXCOORD" if elem.is_float() else None
+        else:
+            semantic = None
+            for prefix in (
+                "COLOR",
+                "TANGENT",
+                "BINORMAL",
+                "BLENDINDICES",
+                "BLENDWEIGHT",
+            ):
+                if translated_elem_name.startswith(prefix):
+                    semantic = prefix
+                    break
+        layout_elements.append((elem, semantic, translated_elem_index))
+    return layout_elements
+
+
+def blender_vertex_to_3dmigoto_vertex(
+    blender_vertex,
+    normal_translation,
+    layout_elements,
+    float_attributes,
+    int_attributes,
+    vertex_blend_groups,
+    vertex_blend_weights,
+):
+    """Convert a single vertex of a pointlist mesh, loop meshes go through build_loop_elements.
+    Loop only elements (COLOR, TEXCOORD) have no per-vertex source and are left out"""
+    normal_scale, normal_bias = normal_translation
+    vertex = {}
+
+    # TODO: Warn if vertex is in too many vertex groups for this layout,
+    # ignoring groups with weight=0.0
+    blend_groups = vertex_blend_groups[blender_vertex.index]
+    blend_weights = vertex_blend_weights[blender_vertex.index]
+
+    for elem, semantic, semantic_index in layout_elements:
+        if semantic == "POSITION":
+            if "POSITION.w" in float_attributes:
                 vertex[elem.name] = list(blender_vertex.undeformed_co) + [
-                    custom_attributes_float(mesh)["POSITION.w"]
-                    .data[blender_vertex.index]
-                    .value
+                    float_attributes["POSITION.w"][blender_vertex.index].item()
                 ]
             else:
                 vertex[elem.name] = elem.pad(list(blender_vertex.undeformed_co), 1.0)
-        elif translated_elem_name.startswith("COLOR"):
-            if elem.name in mesh.vertex_colors:
-                vertex[elem.name] = elem.clip(
-                    list(
-                        mesh.vertex_colors[elem.name]
-                        .data[blender_loop_vertex.index]
-                        .color
-                    )
-                )
-            else:
-                vertex[elem.name] = list(
-                    mesh.vertex_colors[elem.name + ".RGB"]
-                    .data[blender_loop_vertex.index]
-                    .color
-                )[:3] + [
-                    mesh.vertex_colors[elem.name + ".A"]
-                    .data[blender_loop_vertex.index]
-                    .color[0]
-                ]
-        elif translated_elem_name == "NORMAL":
-            if "NORMAL.w" in custom_attributes_float(mesh):
-                vertex[elem.name] = list(
-                    map(translate_normal, blender_loop_vertex.normal)
-                ) + [
-                    custom_attributes_float(mesh)["NORMAL.w"]
-                    .data[blender_vertex.index]
-                    .value
+        elif semantic in ("COLOR", "TEXCOORD"):
+            # Stored per loop, reported once by the caller
+            continue
+        elif semantic == "NORMAL":
+            # XXX: point list topology, these normals are probably going to be pretty poor, but at least it's something to export
+            normal = [x * normal_scale + normal_bias for x in blender_vertex.normal]
+            if "NORMAL.w" in float_attributes:
+                vertex[elem.name] = normal + [
+                    float_attributes["NORMAL.w"][blender_vertex.index].item()
                 ]
-            elif blender_loop_vertex:
-                vertex[elem.name] = elem.pad(
-                    list(map(translate_normal, blender_loop_vertex.normal)), 0.0
-                )
             else:
-                # XXX: point list topology, these normals are probably going to be pretty poor, but at least it's something to export
-                vertex[elem.name] = elem.pad(
-                    list(map(translate_normal, blender_vertex.normal)), 0.0
-                )
-        elif translated_elem_name.startswith("TANGENT"):
-            if export_outline:
-                # Genshin optimized outlines
-                vertex[elem.name] = elem.pad(
-                    list(
-                        map(
-                            translate_tangent,
-                            export_outline.get(
-                                blender_loop_vertex.vertex_index, blp_normal
-                            ),
-                        )
-                    ),
-                    blender_loop_vertex.bitangent_sign,
-                )
-            # DOAXVV has +1/-1 in the 4th component. Not positive what this is,
-            # but guessing maybe the bitangent sign? Not even sure it is used...
-            # FIXME: Other games
-            elif blender_loop_vertex:
-                vertex[elem.name] = elem.pad(
-                    list(map(translate_tangent, blender_loop_vertex.tangent)),
-                    blender_loop_vertex.bitangent_sign,
-                )
-            else:
-                # XXX Blender doesn't save tangents outside of loops, so unless
-                # we save these somewhere custom when importing they are
-                # effectively lost. We could potentially calculate a tangent
-                # from blender_vertex.normal, but there is probably little
-                # point given that normal will also likely be garbage since it
-                # wasn't imported from the mesh.
-                pass
-        elif translated_elem_name.startswith("BINORMAL"):
-            # Some DOA6 meshes (skirts) use BINORMAL, but I'm not certain it is
-            # actually the binormal. These meshes are weird though, since they
-            # use 4 dimensional positions and normals, so they aren't something
-            # we can really deal with at all. Therefore, the below is untested,
-            # FIXME: So find a mesh where this is actually the binormal,
-            # uncomment the below code and test.
-            # normal = blender_loop_vertex.normal
-            # tangent = blender_loop_vertex.tangent
-            # binormal = numpy.cross(normal, tangent)
-            # XXX: Does the binormal need to be normalised to a unit vector?
-            # binormal = binormal / numpy.linalg.norm(binormal)
-            # vertex[elem.name] = elem.pad(list(map(translate_binormal, binormal)), 0.0)
+                vertex[elem.name] = elem.pad(normal, 0.0)
+        elif semantic == "TANGENT":
+            # XXX Blender doesn't save tangents outside of loops, so unless
+            # we save these somewhere custom when importing they are
+            # effectively lost. We could potentially calculate a tangent
+            # from blender_vertex.normal, but there is probably little
+            # point given that normal will also likely be garbage since it
+            # wasn't imported from the mesh.
+            pass
+        elif semantic == "BINORMAL":
+            # Built from loop tangents in build_loop_elements, same as TANGENT above
             pass
-        elif translated_elem_name.startswith("BLENDINDICES"):
-            i = translated_elem_index * 4
-            vertex[elem.name] = elem.pad([x.group for x in vertex_groups[i : i + 4]], 0)
-        elif translated_elem_name.startswith("BLENDWEIGHT"):
+        elif semantic == "BLENDINDICES":
+            i = semantic_index * 4
+            vertex[elem.name] = elem.pad(blend_groups[i : i + 4], 0)
+        elif semantic == "BLENDWEIGHT":
             # TODO: Warn if vertex is in too many vertex groups for this layout
-            i = translated_elem_index * 4
-            vertex[elem.name] = elem.pad(
-                [x.weight for x in vertex_groups[i : i + 4]], 0.0
-            )
-        elif translated_elem_name.startswith("TEXCOORD") and elem.is_float():
-            uvs = []
-            for uv_name in ("%s.xy" % elem.remapped_name, "%s.zw" % elem.remapped_name):
-                if uv_name in texcoords:
-                    uvs += list(texcoords[uv_name][blender_loop_vertex.index])
-            # Handle 1D + 3D TEXCOORDs. Order is important - 1D TEXCOORDs won't
-            # match anything in above loop so only .x below, 3D TEXCOORDS will
-            # have processed .xy part above, and .z part below
-            for uv_name in ("%s.x" % elem.remapped_name, "%s.z" % elem.remapped_name):
-                if uv_name in texcoords:
-                    uvs += [texcoords[uv_name][blender_loop_vertex.index].x]
-            vertex[elem.name] = uvs
+            i = semantic_index * 4
+            vertex[elem.name] = elem.pad(blend_weights[i : i + 4], 0.0)
         else:
             # Unhandled semantics are saved in vertex layers
             data = []
             for component in "xyzw":
                 layer_name = "%s.%s" % (elem.name, component)
-                if layer_name in custom_attributes_int(mesh):
+                if layer_name in int_attributes:
+                    data.append(int_attributes[layer_name][blender_vertex.index].item())
+                elif layer_name in float_attributes:
                     data.append(
-                        custom_attributes_int(mesh)[layer_name]
-                        .data[blender_vertex.index]
-                        .value
-                    )
-                elif layer_name in custom_attributes_float(mesh):
-                    data.append(
-                        custom_attributes_float(mesh)[layer_name]
-                        .data[blender_vertex.index]
-                        .value
+                        float_attributes[layer_name][blender_vertex.index].item()
                     )
             if data:
                 # print('Retrieved unhandled semantic %s %s from vertex layer' % (elem.name, elem.Format), data)
@@ -956,6 +929,146 @@ def blender_vertex_to_3dmigoto_vertex(
     return vertex
 
 
+def pad_columns(elem, data: numpy.ndarray, val) -> numpy.ndarray:
+    """Pad every row of (loops, components) array to the element width, like elem.pad does for one vertex"""
+    padding = elem.format_len - data.shape[1]
+    assert padding >= 0
+    if padding == 0:
+        return data
+    return numpy.hstack((data, numpy.full((len(data), padding), val, dtype=data.dtype)))
+
+
+def build_loop_elements(
+    mesh: Mesh,
+    layout_elements,
+    texcoords,
+    loop_vertex_ids,
+    export_normals,
+    export_tangents,
+    loop_bitangent_signs,
+    loop_colors,
+    float_attributes,
+    int_attributes,
+    vertex_blend_groups,
+    vertex_blend_weights,
+    export_binormals=None,
+) -> dict[str, numpy.ndarray]:
+    """Build (loops, components) array of every element.
+    Elements are converted for the whole mesh with numpy instead of loop by loop"""
+    positions = numpy.empty(len(mesh.vertices) * 3, dtype=numpy.float32)
+    mesh.vertices.foreach_get("undeformed_co", positions)
+    positions = positions.reshape(-1, 3)
+
+    def per_vertex_rows(values: list, width: int, dtype) -> numpy.ndarray:
+        return numpy.array(values, dtype=dtype).reshape(len(values), width)
+
+    elements = {}
+    for elem, semantic, semantic_index in layout_elements:
+        if semantic == "POSITION":
+            data = positions[loop_vertex_ids]
+            if "POSITION.w" in float_attributes:
+                data = numpy.column_stack(
+                    (data, float_attributes["POSITION.w"][loop_vertex_ids])
+                )
+            else:
+                data = pad_columns(elem, data, 1.0)
+            elements[elem.name] = data
+        elif semantic == "COLOR":
+            if elem.name in loop_colors:
+                data = loop_colors[elem.name][:, : elem.format_len]
+            else:
+                data = numpy.column_stack(
+                    (
+                        loop_colors[elem.name + ".RGB"][:, :3],
+                        loop_colors[elem.name + ".A"][:, 0],
+                    )
+                )
+            elements[elem.name] = data
+        elif semantic == "NORMAL":
+            if "NORMAL.w" in float_attributes:
+                data = numpy.column_stack(
+                    (export_normals, float_attributes["NORMAL.w"][loop_vertex_ids])
+                )
+            else:
+                data = pad_columns(elem, export_normals, 0.0)
+            elements[elem.name] = data
+        elif semantic == "TANGENT":
+            # Remaining components are filled with the bitangent sign
+            padding = elem.format_len - export_tangents.shape[1]
+            assert padding >= 0
+            signs = loop_bitangent_signs.astype(numpy.float64).reshape(-1, 1)
+            elements[elem.name] = numpy.hstack(
+                (export_tangents, numpy.repeat(signs, padding, axis=1))
+            )
+        elif semantic == "BINORMAL":
+            if export_binormals is not None:
+                elements[elem.name] = pad_columns(elem, export_binormals, 0.0)
+        elif semantic == "BLENDINDICES":
+            i = semantic_index * 4
+            data = per_vertex_rows(
+                [elem.pad(groups[i : i + 4], 0) for groups in vertex_blend_groups],
+                elem.format_len,
+                numpy.int64,
+            )
+            elements[elem.name] = data[loop_vertex_ids]
+        elif semantic == "BLENDWEIGHT":
+            i = semantic_index * 4
+            data = per_vertex_rows(
+                [elem.pad(weights[i : i + 4], 0.0) for weights in vertex_blend_weights],
+                elem.format_len,
+                numpy.float64,
+            )
+            elements[elem.name] = data[loop_vertex_ids]
+        elif semantic == "TEXCOORD":
+            columns = []
+            for uv_name in ("%s.xy" % elem.remapped_name, "%s.zw" % elem.remapped_name):
+                if uv_name in texcoords:
+                    columns.append(texcoords[uv_name])
+            # Handle 1D + 3D TEXCOORDs. Order is important - 1D TEXCOORDs won't
+            # match anything in above loop so only .x below, 3D TEXCOORDS will
+            # have processed .xy part above, and .z part below
+            for uv_name in ("%s.x" % elem.remapped_name, "%s.z" % elem.remapped_name):
+                if uv_name in texcoords:
+                    columns.append(texcoords[uv_name][:, :1])
+            if columns:
+                elements[elem.name] = numpy.hstack(columns)
+            else:
+                elements[elem.name] = numpy.empty((len(loop_vertex_ids), 0))
+        elif semantic is None:
+            # Unhandled semantics are saved in vertex layers
+            columns = []
+            for component in "xyzw":
+                layer_name = "%s.%s" % (elem.name, component)
+                if layer_name in int_attributes:
+                    columns.append(int_attributes[layer_name])
+                elif layer_name in float_attributes:
+                    columns.append(float_attributes[layer_name])
+            if columns:
+                # Object array keeps int components as ints when they're mixed with floats
+                data = numpy.empty((len(mesh.vertices), len(columns)), dtype=object)
+                for i, column in enumerate(columns):
+                    data[:, i] = column.tolist()
+                elements[elem.name] = data[loop_vertex_ids]
+
+        if elem.name not in elements:
+            print("NOTICE: Unhandled vertex element: %s" % elem.name)
+
+    return elements
+
+
+def find_unique_loops(
+    loop_elements: dict[str, numpy.ndarray], loop_count: int
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Find loops with exactly the same values of all elements.
+    Returns first loop of every unique vertex in order of appearance
+    and vertex index of every loop"""
+    # Constant column keeps the key from being empty when no element has values
+    columns = [numpy.zeros((loop_count, 1))]
+    for data in loop_elements.values():
+        columns.append(data.reshape(loop_count, -1).astype(numpy.float64))
+    return unique_rows(numpy.hstack(columns))
+
+
 def export_3dmigoto(
     operator: Operator, context: Context, vb_path, ib_path, fmt_path, ini_path
 ):
@@ -1003,30 +1116,84 @@ def export_3dmigoto(
             ),
         )
 
+    # Fetch per-loop data in bulk, reading it from loops one by one via RNA is slow
+    loop_count = len(mesh.loops)
+    loop_normals = numpy.empty(loop_count * 3, dtype=numpy.float32)
+    mesh.loops.foreach_get("normal", loop_normals)
+    loop_normals = loop_normals.reshape(-1, 3)
+    loop_tangents = numpy.empty(loop_count * 3, dtype=numpy.float32)
+    mesh.loops.foreach_get("tangent", loop_tangents)
+    loop_tangents = loop_tangents.reshape(-1, 3)
+    loop_bitangent_signs = numpy.empty(loop_count, dtype=numpy.float32)
+    mesh.loops.foreach_get("bitangent_sign", loop_bitangent_signs)
+
+    loop_colors = {}
+    for vertex_color in mesh.vertex_colors:
+        colors = numpy.empty(loop_count * 4, dtype=numpy.float32)
+        vertex_color.data.foreach_get("color", colors)
+        loop_colors[vertex_color.name] = colors.reshape(-1, 4)
+
     texcoord_layers = {}
     for uv_layer in mesh.uv_layers:
-        texcoords = {}
+        texcoords = numpy.empty(loop_count * 2, dtype=numpy.float32)
+        uv_layer.data.foreach_get("uv", texcoords)
+        texcoords = texcoords.reshape(-1, 2)
 
         try:
             flip_texcoord_v = obj["3DMigoto:" + uv_layer.name]["flip_v"]
-            if flip_texcoord_v:
-                flip_uv = lambda uv: (uv[0], 1.0 - uv[1])
-            else:
-                flip_uv = lambda uv: uv
         except KeyError:
-            flip_uv = lambda uv: uv
+            flip_texcoord_v = False
+        if flip_texcoord_v:
+            texcoords[:, 1] = 1.0 - texcoords[:, 1]
 
-        for loop in mesh.loops:
-            uv = flip_uv(uv_layer.data[loop.index].uv)
-            texcoords[loop.index] = uv
         texcoord_layers[uv_layer.name] = texcoords
 
-    translate_normal = normal_export_translation(
+    normal_translation = normal_export_translation(
         layout, Semantic.Normal, operator.flip_normal
     )
-    translate_tangent = normal_export_translation(
+    tangent_translation = normal_export_translation(
         layout, Semantic.Tangent, operator.flip_tangent
     )
+    # Translate all loop normals and tangents at once, in double precision like Python floats
+    normal_scale, normal_bias = normal_translation
+    export_normals = loop_normals.astype(numpy.float64) * normal_scale + normal_bias
+    tangent_scale, tangent_bias = tangent_translation
+    export_tangents = loop_tangents.astype(numpy.float64) * tangent_scale + tangent_bias
+
+    # Flags reused offsets on the layout elements, must run before resolving them
+    vb = VertexBufferGroup(layout=layout, topology=topology)
+    vb.flag_invalid_semantics()
+    layout_elements = resolve_layout_elements(layout)
+    float_attributes = fetch_custom_attribute_values(
+        custom_attributes_float(mesh), numpy.float32
+    )
+    int_attributes = fetch_custom_attribute_values(
+        custom_attributes_int(mesh), numpy.int32
+    )
+    if any(
+        semantic in ("BLENDINDICES", "BLENDWEIGHT")
+        for _, semantic, _ in layout_elements
+    ):
+        vertex_blend_groups, vertex_blend_weights = fetch_sorted_vertex_groups(mesh)
+    else:
+        # Layout has no blend semantics, don't read vertex groups at all
+        vertex_blend_groups = vertex_blend_weights = [[]] * len(mesh.vertices)
+    export_binormals = None
+    if any(semantic == "BINORMAL" for _, semantic, _ in layout_elements):
+        # Same as Blender's loop bitangent: cross of normal and tangent times the bitangent sign,
+        # built from the flipped normal and tangent so all three stay one basis
+        flip = (-1.0 if operator.flip_normal else 1.0) * (
+            -1.0 if operator.flip_tangent else 1.0
+        )
+        binormals = numpy.cross(loop_normals, loop_tangents).astype(numpy.float64)
+        binormals *= loop_bitangent_signs.reshape(-1, 1) * flip
+        # Custom split normals leave the tangent not exactly perpendicular to the normal
+        norm = numpy.linalg.norm(binormals, axis=1, keepdims=True)
+        binormals /= numpy.where(norm == 0, 1, norm)
+        binormal_scale, binormal_bias = normal_export_translation(
+            layout, Semantic.Binormal, False
+        )
+        export_binormals = binormals * binormal_scale + binormal_bias
 
     # Blender's vertices have unique positions, but may have multiple
     # normals, tangents, UV coordinates, etc - these are stored in the
@@ -1035,57 +1202,81 @@ def export_3dmigoto(
     # completely blow this out - we still want to reuse identical vertices
     # via the index buffer. There might be a convenience function in
     # Blender to do this, but it's easy enough to do this ourselves
-    indexed_vertices = collections.OrderedDict()
-    vb = VertexBufferGroup(layout=layout, topology=topology)
-    vb.flag_invalid_semantics()
+    # Loops are compared as rows of all their element values with numpy, see find_unique_loops
     if vb.topology == "trianglelist":
-        for poly in mesh.polygons:
-            face = []
-            for blender_lvertex in mesh.loops[
-                poly.loop_start : poly.loop_start + poly.loop_total
-            ]:
-                vertex = blender_vertex_to_3dmigoto_vertex(
-                    mesh,
-                    obj,
-                    blender_lvertex,
-                    layout,
-                    texcoord_layers,
-                    None,
-                    translate_normal,
-                    translate_tangent,
+        loop_vertex_ids = numpy.empty(loop_count, dtype=numpy.int32)
+        mesh.loops.foreach_get("vertex_index", loop_vertex_ids)
+        loop_elements = build_loop_elements(
+            mesh,
+            layout_elements,
+            texcoord_layers,
+            loop_vertex_ids,
+            export_normals,
+            export_tangents,
+            loop_bitangent_signs,
+            loop_colors,
+            float_attributes,
+            int_attributes,
+            vertex_blend_groups,
+            vertex_blend_weights,
+            export_binormals=export_binormals,
+        )
+        if ib is not None:
+            # Note: foreach_get provides loop data in the same order as iteration over polygons
+            unique_loops, loop_indices = find_unique_loops(loop_elements, loop_count)
+        else:
+            if operator.flip_winding and loop_count > 0:
+                raise Fatal(
+                    "Flipping winding order without index buffer not implemented"
                 )
-                if ib is not None:
-                    face.append(
-                        indexed_vertices.setdefault(
-                            HashableVertex(vertex), len(indexed_vertices)
-                        )
-                    )
-                else:
-                    if operator.flip_winding:
-                        raise Fatal(
-                            "Flipping winding order without index buffer not implemented"
-                        )
-                    vb.append(vertex)
-            if ib is not None:
+            unique_loops = numpy.arange(loop_count)
+
+        names = list(loop_elements)
+        columns = [loop_elements[name][unique_loops].tolist() for name in names]
+        if names:
+            for values in zip(*columns):
+                vb.append(dict(zip(names, values)))
+        else:
+            for _ in range(len(unique_loops)):
+                vb.append({})
+
+        if ib is not None:
+            poly_count = len(mesh.polygons)
+            poly_loop_starts = numpy.empty(poly_count, dtype=numpy.int32)
+            mesh.polygons.foreach_get("loop_start", poly_loop_starts)
+            poly_loop_totals = numpy.empty(poly_count, dtype=numpy.int32)
+            mesh.polygons.foreach_get("loop_total", poly_loop_totals)
+            loop_indices = loop_indices.tolist()
+            for loop_start, loop_total in zip(
+                poly_loop_starts.tolist(), poly_loop_totals.tolist()
+            ):
+                face = loop_indices[loop_start : loop_start + loop_total]
                 if operator.flip_winding:
                     face.reverse()
                 ib.append(face)
-
-        if ib is not None:
-            for vertex in indexed_vertices:
-                vb.append(vertex)
     elif vb.topology == "pointlist":
+        loop_only = [
+            elem.name
+            for elem, semantic, _ in layout_elements
+            if semantic in ("COLOR", "TEXCOORD")
+        ]
+        if loop_only:
+            operator.report(
+                {"WARNING"},
+                "Pointlist mesh has no per-vertex source for {}, these elements are not exported".format(
+                    ", ".join(loop_only)
+                ),
+            )
         for index, blender_vertex in enumerate(mesh.vertices):
             vb.append(
                 blender_vertex_to_3dmigoto_vertex(
-                    mesh,
-                    obj,
-                    None,
-                    layout,
-                    texcoord_layers,
                     blender_vertex,
-                    translate_normal,
-                    translate_tangent,
+                    normal_translation,
+                    layout_elements,
+                    float_attributes,
+                    int_attributes,
+                    vertex_blend_groups,
+                    vertex_blend_weights,
                 )
             )
             if ib is not None:
@@ -1099,24 +1290,44 @@ def export_3dmigoto(
         if k.startswith("3DMigoto:VGMap:")
     }
 
+    # Vertices are encoded once, VGMaps only re-encode their remapped BLENDINDICES
+    encoded_vb = vb.encode(strides)
     if "" not in vgmaps:
-        vb.write(vb_path, strides, operator=operator)
+        vb.write(vb_path, strides, operator=operator, encoded=encoded_vb)
 
     for suffix, vgmap in vgmaps.items():
-        ib_path = vb_path
+        # Every VGMap gets its own copy of the VB, the IB is shared and written below
+        path = vb_path
         if suffix:
-            ib_path = f"{vb_path.parent / vb_path.stem}-{suffix}{vb_path.suffix}"
-        vgmap_path = (ib_path.parent / ib_path.stem) + ".vgmap"
-        print("Exporting %s..." % ib_path)
+            path = vb_path.with_name(f"{vb_path.stem}-{suffix}{vb_path.suffix}")
+        vgmap_path = path.with_suffix(".vgmap")
+        print("Exporting %s..." % path)
         vb.remap_blendindices(obj, vgmap)
-        vb.write(ib_path, strides, operator=operator)
+        vb.encode_blendindices(encoded_vb, strides)
+        vb.write(path, strides, operator=operator, encoded=encoded_vb)
         vb.revert_blendindices_remap()
-        sorted_vgmap = collections.OrderedDict(
-            sorted(vgmap.items(), key=lambda x: x[1])
-        )
-        json.dump(sorted_vgmap, open(vgmap_path, "w"), indent=2)
+        sorted_vgmap = dict(sorted(vgmap.items(), key=lambda x: x[1]))
+        if orjson is not None:
+            # Numeric group names are int keys here, stdlib json stringifies them too
+            vgmap_path.write_bytes(
+                orjson.dumps(
+                    sorted_vgmap,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+                )
+            )
+        else:
+            with open(vgmap_path, "w") as f:
+                json.dump(sorted_vgmap, f, indent=2)
 
     if ib is not None:
+        if (
+            operator.compress_indices
+            and ib.format == "DXGI_FORMAT_R32_UINT"
+            and len(vb) < 0xFFFF
+        ):
+            # Every index fits in 16 bits and stays below the 0xFFFF strip cut value
+            ib.format = "DXGI_FORMAT_R16_UINT"
+            ib.encoder, ib.decoder = EncoderDecoder(ib.format)
         ib.write(open(ib_path, "wb"), operator=operator)
 
     # Write format reference file
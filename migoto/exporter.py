@@ -1,7 +1,10 @@
 import shutil
+import sys
 import time
 import json
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Union
 
@@ -10,6 +13,18 @@ import numpy
 from bpy.types import Collection, Context, Depsgraph, Mesh, Object, Operator, Scene
 from numpy.typing import NDArray
 
+try:
+    import orjson
+except ImportError:
+    # orjson isn't bundled with Blender, stdlib json is used unless it's installed
+    orjson = None
+
+if sys.platform.startswith("linux"):
+    import fcntl
+else:
+    # FICLONE below is a Linux ioctl number, other platforms always do a full copy
+    fcntl = None
+
 from .. import bl_info
 from ..libs.jinja2 import Environment, FileSystemLoader
 from .data.byte_buffer import (
@@ -25,6 +40,9 @@ from .datastructures import GameEnum
 from .export_ops import mesh_triangulate
 from .operators import Fatal
 
+# Texture slots skipped by the "no ramps" option
+RAMP_TEXTURE_NAMES = frozenset({"shadowramp", "metalmap", "diffuseguide"})
+
 
 @dataclass
 class SubObj:
@@ -107,6 +125,7 @@ class ModExporter:
     ini_content: str = field(init=False)
     files_to_write: dict[Path, Union[str, NDArray]] = field(init=False)
     files_to_copy: dict[Path, Path] = field(init=False)
+    export_start: float = field(init=False, default=0.0)
 
     def __post_init__(self) -> None:
         print("Initializing data for export...")
@@ -153,9 +172,6 @@ class ModExporter:
         )
         if self.ignore_hidden:
             candidate_objs = [obj for obj in candidate_objs if obj.visible_get()]
-        if self.only_selected:
-            selected_objs = [obj for obj in bpy.context.selected_objects]
-            candidate_objs = [obj for obj in candidate_objs if obj in selected_objs]
         self.mod_file = ModFile(
             name=self.mod_name,
             components=[],
@@ -198,15 +214,11 @@ class ModExporter:
                         textures = [
                             t
                             for t in textures
-                            if t.name.lower()
-                            not in [
-                                "shadowramp",
-                                "metalmap",
-                                "diffuseguide",
-                            ]
+                            if t.name.lower() not in RAMP_TEXTURE_NAMES
                         ]
+                # Part names extend the component name, so only its matches need a scan
                 matching_objs: list[Object] = [
-                    obj for obj in candidate_objs if obj.name.startswith(part_name)
+                    obj for obj in comp_matching_objs if obj.name.startswith(part_name)
                 ]
                 if component["draw_vb"] != "":
                     if not matching_objs:
@@ -246,29 +258,37 @@ class ModExporter:
         destination: list[SubObj],
         depth: int = 0,
     ) -> None:
-        """Recursively get all objects from a collection and its sub-collections."""
+        """Get all objects from a collection and its sub-collections."""
         if destination == []:
             final_mesh: Mesh = self.process_mesh(main_obj, main_obj)
             destination.append(SubObj("", depth, main_obj.name, main_obj, final_mesh))
         if collection is None:
             return
 
-        objs = [
-            obj for obj in collection.objects if obj.type == "MESH" and obj != main_obj
-        ]
-        if self.ignore_hidden:
-            objs = [obj for obj in objs if obj.visible_get()]
-        if self.only_selected:
-            selected_objs = [obj for obj in bpy.context.selected_objects]
-            objs = [obj for obj in objs if obj in selected_objs]
-        sorted_objs = sorted(objs, key=lambda x: x.name)
-        for obj in sorted_objs:
-            final_mesh = self.process_mesh(main_obj, obj)
-            destination.append(
-                SubObj(collection.name, depth, obj.name, obj, final_mesh)
-            )
-        for child in collection.children:
-            self.obj_from_col(main_obj, child, destination, depth + 1)
+        selected_objs = (
+            set(bpy.context.selected_objects) if self.only_selected else None
+        )
+        # Walk the collection tree with an explicit stack instead of recursion
+        stack: list[tuple[Collection, int]] = [(collection, depth)]
+        while stack:
+            collection, depth = stack.pop()
+            objs = [
+                obj
+                for obj in collection.objects
+                if obj.type == "MESH" and obj != main_obj
+            ]
+            if self.ignore_hidden:
+                objs = [obj for obj in objs if obj.visible_get()]
+            if selected_objs is not None:
+                objs = [obj for obj in objs if obj in selected_objs]
+            sorted_objs = sorted(objs, key=lambda x: x.name)
+            for obj in sorted_objs:
+                final_mesh = self.process_mesh(main_obj, obj)
+                destination.append(
+                    SubObj(collection.name, depth, obj.name, obj, final_mesh)
+                )
+            # Push children reversed, so they are still visited in their original order
+            stack.extend((child, depth + 1) for child in reversed(collection.children))
 
     def process_mesh(self, main_obj: Object, obj: Object) -> Mesh:
         """Process the mesh of the object."""
@@ -282,18 +302,18 @@ class ModExporter:
             # Matrix world seems to be the summatory of all transforms parents included
             # Might need to test for more edge cases and to confirm these suspicious,
             # other available options: matrix_local, matrix_basis, matrix_parent_inverse
-            final_mesh.transform(obj.matrix_world)
-            final_mesh.transform(main_obj.matrix_world.inverted())
+            # Both transforms are combined into one matrix, so vertices are only walked once
+            final_mesh.transform(main_obj.matrix_world.inverted() @ obj.matrix_world)
         mesh_triangulate(final_mesh)
-        masked_vgs = [
+        masked_vgs: set[int] = {
             vg.index for vg in obj.vertex_groups if vg.name.startswith("MASK")
-        ]
-        _ = [
-            vg.__setattr__("weight", 0.0)
-            for vert in final_mesh.vertices
-            for vg in vert.groups
-            if vg.group in masked_vgs
-        ]
+        }
+        # Walking every vertex through RNA is slow, only do it when there is something to mask
+        if masked_vgs:
+            for vert in final_mesh.vertices:
+                for vg in vert.groups:
+                    if vg.group in masked_vgs:
+                        vg.weight = 0.0
         self.__objs_to_cleanup.append(obj)
         return final_mesh
 
@@ -329,12 +349,19 @@ class ModExporter:
             if self.write_buffers is False:
                 for key in out_buffers.keys():
                     excluded_buffers.append(key)
+            # Buffers of every object are concatenated once per component instead of
+            # growing the output on every object, which would copy it over and over
+            pending_buffers: dict[str, list[NumpyBuffer]] = {
+                key: [] for key in out_buffers
+            }
+            part_ibs: list[NumpyBuffer] = []
             vb_offset: int = 0
             for part in component.parts:
                 print(f"Processing {part.fullname} " + "-" * 10)
                 part_ib: NumpyBuffer = NumpyBuffer(
                     layout=data_model.buffers_format["IB"]
                 )
+                part_ib_pieces: list[NumpyBuffer] = []
                 ib_offset: int = 0
                 for t in part.textures:
                     tex_name = part.fullname + t.name + t.extension
@@ -364,11 +391,11 @@ class ModExporter:
                         data_model.mirror_mesh,
                     )
                     gen_buffers["IB"].data["INDEX"] += vb_offset
-                    for k, v in out_buffers.items():
+                    for k, pending in pending_buffers.items():
                         if k not in gen_buffers:
                             continue
-                        v.append(gen_buffers[k])
-                    part_ib.append(gen_buffers["IB"])
+                        pending.append(gen_buffers[k])
+                    part_ib_pieces.append(gen_buffers["IB"])
                     vb_offset += v_count
                     entry.vertex_count = v_count
                     part.vertex_count += v_count
@@ -376,13 +403,20 @@ class ModExporter:
                     entry.index_count = len(gen_buffers["IB"].data)
                     entry.index_offset = ib_offset
                     ib_offset += entry.index_count
+                part_ib.extend(part_ib_pieces)
                 if len(part_ib) == 0:
                     print(f"Skipping {part.fullname}.ib due to no index data.")
                     continue
-                component_ib.append(part_ib.copy())
+                # The merged component IB is only read by outline optimization, skip building
+                # it otherwise. Part IBs aren't modified after this point, so no copy is needed
+                if self.outline_optimization:
+                    part_ibs.append(part_ib)
                 self.files_to_write[self.destination / (part.fullname + ".ib")] = (
                     part_ib.data
                 )
+            for k, pending in pending_buffers.items():
+                out_buffers[k].extend(pending)
+            component_ib.extend(part_ibs)
             if self.outline_optimization:
                 self.optimize_outlines(out_buffers, component_ib)
             if component.blend_vb != "":
@@ -511,16 +545,12 @@ class ModExporter:
             norm = numpy.where(norm == 0, 1, norm)
             return vector / norm
 
-        def calc_angle(edge_a: NDArray, edge_b: NDArray) -> NDArray:
-            """Calculate the angle between two edges in radians."""
-            vector_a = numpy.abs(unit_vector(edge_a))
-            vector_b = numpy.abs(unit_vector(edge_b))
-            return numpy.arccos(
-                numpy.clip(
-                    numpy.einsum("ij, ij->i", vector_a, vector_b),
-                    -1,
-                    1,
-                )
+        def calc_angle(vector_a: NDArray, vector_b: NDArray) -> NDArray:
+            """Calculate the angle between two vectors in radians."""
+            # atan2 of |a x b| and a.b needs no normalization and stays accurate near 0 and pi
+            return numpy.arctan2(
+                numpy.linalg.norm(numpy.cross(vector_a, vector_b), axis=1),
+                numpy.einsum("ij, ij->i", vector_a, vector_b),
             )
 
         pos_buf: NumpyBuffer = output_buffs["Position"]
@@ -536,9 +566,13 @@ class ModExporter:
         edge0: NDArray = triangles[:, 1] - triangles[:, 2]
         edge1: NDArray = triangles[:, 2] - triangles[:, 0]
         edge2: NDArray = triangles[:, 0] - triangles[:, 1]
-        angle0: NDArray = calc_angle(edge2, edge1)
-        angle1: NDArray = calc_angle(edge0, edge2)
-        angle2: NDArray = calc_angle(edge1, edge0)
+        # Every edge takes part in two corner angles, take its absolute value only once
+        abs_edge0: NDArray = numpy.abs(edge0)
+        abs_edge1: NDArray = numpy.abs(edge1)
+        abs_edge2: NDArray = numpy.abs(edge2)
+        angle0: NDArray = calc_angle(abs_edge2, abs_edge1)
+        angle1: NDArray = calc_angle(abs_edge0, abs_edge2)
+        angle2: NDArray = calc_angle(abs_edge1, abs_edge0)
         loops_angle: NDArray = numpy.zeros((len(triangles), 3), dtype=numpy.float32)
         loops_angle[:, 0] = angle0
         loops_angle[:, 1] = angle1
@@ -551,22 +585,35 @@ class ModExporter:
             (len(pos_buf), 3), dtype=numpy.float32
         )
 
-        loops_round_coord: NDArray = numpy.round(
-            loops_coord, self.outline_rounding_precision
+        # Adding 0.0 folds -0.0 into 0.0 so both end up with the same bytes
+        loops_round_coord: NDArray = numpy.ascontiguousarray(
+            numpy.round(loops_coord, self.outline_rounding_precision) + 0.0
         )
         loops_angle = loops_angle.flatten()
         loops_weighted_normal = loops_face_normal * loops_angle[:, None]
 
+        # View every xyz row as a single opaque key, so unique runs one flat sort
+        # instead of the much slower lexicographic axis=0 sort
+        loops_coord_keys: NDArray = loops_round_coord.view(
+            numpy.dtype((numpy.void, loops_round_coord.dtype.itemsize * 3))
+        ).ravel()
         u, u_idx, u_inverse = numpy.unique(
-            loops_round_coord,
-            axis=0,
+            loops_coord_keys,
             return_index=True,
             return_inverse=True,
         )
 
-        accumulated_normals: NDArray = numpy.zeros((len(u), 3), dtype=numpy.float32)
-        # Use numpy.add.at to efficiently sum weighted normals for each unique vertex
-        numpy.add.at(accumulated_normals, u_inverse, loops_weighted_normal)
+        # Sum weighted normals for each unique vertex, one bincount per axis is a
+        # buffered reduction and much faster than the unbuffered numpy.add.at
+        accumulated_normals: NDArray = numpy.stack(
+            [
+                numpy.bincount(
+                    u_inverse, weights=loops_weighted_normal[:, axis], minlength=len(u)
+                )
+                for axis in range(3)
+            ],
+            axis=1,
+        )
         magnitudes: NDArray = numpy.linalg.norm(
             accumulated_normals, axis=1, keepdims=True
         )
@@ -665,16 +712,23 @@ class ModExporter:
                 raise Fatal(f"Error writing file {file_path}: {e}")
         if not self.copy_textures:
             return
-        for src, dest in self.files_to_copy.items():
-            try:
+        # Texture copies are independent and IO bound, run them on a few threads
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            copies: dict[Future, tuple[Path, Path]] = {}
+            for src, dest in self.files_to_copy.items():
                 print(f" - {dest.name}")
-                if not dest.exists():
-                    dest.parent.mkdir(parents=True, exist_ok=True)
                 if dest.exists():
                     continue
-                shutil.copy(src, dest)
-            except (OSError, IOError) as e:
-                raise Fatal(f"Error copying file {src} to {dest}: {e}")
+                try:
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                except (OSError, IOError) as e:
+                    raise Fatal(f"Error copying file {src} to {dest}: {e}")
+                copies[executor.submit(fast_copy, src, dest)] = (src, dest)
+            for copy, (src, dest) in copies.items():
+                try:
+                    copy.result()
+                except (OSError, IOError) as e:
+                    raise Fatal(f"Error copying file {src} to {dest}: {e}")
 
     def cleanup(self) -> None:
         """Cleanup after the exporter."""
@@ -684,27 +738,67 @@ class ModExporter:
                 continue
             obj.data.update()
 
-    def export(self) -> None:
-        """Export the mod file."""
-        start: float = time.time()
+    def export(self, writer: Optional[ThreadPoolExecutor] = None) -> Optional[Future]:
+        """Export the mod file.
+        With a writer the files are written on it and the pending write is returned,
+        call report_exported once it finished."""
+        self.export_start = time.time()
         if len(self.mod_file.components) == 0:
             raise Fatal("No components found to export. Aborting export.")
         print(f"Exporting {self.mod_name} to {self.destination}")
         self.generate_buffers()
         self.generate_ini()
+        if writer is not None:
+            # Buffers and ini are plain data by now, Blender meshes aren't needed for writing
+            self.cleanup()
+            return writer.submit(self.write_files)
         self.write_files()
         self.cleanup()
+        self.report_exported()
+
+    def report_exported(self) -> None:
+        """Report the finished export and the time it took."""
         print()
         self.operator.report(
             {"INFO"},
-            f"Exported {self.mod_name} to {self.destination} in {(time.time() - start):2f} seconds",
+            f"Exported {self.mod_name} to {self.destination} in {(time.time() - self.export_start):2f} seconds",
         )
 
     def load_hashes(self, path: Path) -> list[dict]:
         """Load the hash data from the hash.json file."""
         if not path.exists() or not path.is_file():
             raise Fatal(f"Hash file {path} does not exist or is not a file.")
-        with open(path, "r") as f:
-            char_hashes = json.load(f)
+        # Modification time and size are part of the key, so an edited file is parsed again
+        stat = path.stat()
+        char_hashes = load_json_cached(path, stat.st_mtime_ns, stat.st_size)
         # TODO: Check for hash.json integrity
         return char_hashes
+
+
+@lru_cache(maxsize=8)
+def load_json_cached(path: Path, mtime_ns: int, size: int) -> Union[list, dict]:
+    """Parse a json file, repeated exports from the same dump reuse the parsed result.
+    The result is shared between calls and must not be modified."""
+    hash_data = path.read_bytes()
+    return orjson.loads(hash_data) if orjson is not None else json.loads(hash_data)
+
+
+# FICLONE ioctl request from linux/fs.h, shares extents on BTRFS/XFS instead of copying bytes
+FICLONE = 0x40049409
+
+
+def fast_copy(src: Path, dest: Path) -> None:
+    """Copy file as copy-on-write clone where filesystem supports it, full copy otherwise."""
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as src_file, open(dest, "wb") as dest_file:
+                fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            # Cloning isn't supported by the filesystem, the copy below rewrites
+            # the empty dest, shutil already uses sendfile for it on Linux
+            pass
+        else:
+            shutil.copymode(src, dest)
+            return
+    shutil.copyfile(src, dest)
+    shutil.copymode(src, dest)
@@ -0,0 +1,242 @@
+"""End to end runs of the legacy export_3dmigoto exporter on a small fake mesh.
+
+Outside of Blender bpy, bmesh and mathutils are replaced with empty stand-ins,
+the exporter only needs them for class definitions and reads the mesh through
+foreach_get and plain attribute access, which the fake mesh below provides.
+"""
+
+import importlib
+import struct
+import sys
+import types
+from pathlib import Path
+
+import numpy
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class _Stub:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        # Decorators like orientation_helper(...) return the decorated class
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return _Stub()
+
+    def __class_getitem__(cls, item):
+        return cls
+
+    def __getattr__(self, name):
+        return _Stub()
+
+
+class _StubModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        stub = type(name, (_Stub,), {})
+        setattr(self, name, stub)
+        return stub
+
+
+def _install_blender_stubs():
+    try:
+        import bpy  # noqa: F401
+
+        return
+    except ImportError:
+        pass
+    for name in (
+        "bpy",
+        "bpy.props",
+        "bpy.types",
+        "bpy.utils",
+        "bpy.app.handlers",
+        "bpy_extras",
+        "bpy_extras.io_utils",
+        "bpy_extras.object_utils",
+        "mathutils",
+        "bmesh",
+    ):
+        sys.modules[name] = _StubModule(name)
+    app = types.ModuleType("bpy.app")
+    app.__path__ = []
+    app.version = (3, 6, 0)
+    app.handlers = sys.modules["bpy.app.handlers"]
+    sys.modules["bpy.app"] = app
+    sys.modules["bpy"].app = app
+    sys.modules["bpy"].props = sys.modules["bpy.props"]
+    sys.modules["bpy"].types = sys.modules["bpy.types"]
+    sys.modules["bmesh"].ops = _Stub()
+    sys.modules["bmesh"].new = _Stub
+
+
+@pytest.fixture(scope="module")
+def export_ops():
+    _install_blender_stubs()
+    # Import the add-on as a package without running its registration in __init__
+    package = types.ModuleType("xxmi_tools")
+    package.__path__ = [str(ROOT)]
+    package.bl_info = {"version": (0, 0, 0)}
+    sys.modules["xxmi_tools"] = package
+    sys.path.insert(0, str(ROOT / "libs"))
+    return importlib.import_module("xxmi_tools.migoto.export_ops")
+
+
+class _Collection(list):
+    """bpy_prop_collection stand-in, looked up by name or index"""
+
+    def foreach_get(self, attr, array):
+        values = [getattr(item, attr) for item in self]
+        array[:] = numpy.array(values, dtype=array.dtype).ravel()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return next(item for item in self if item.name == key)
+        return list.__getitem__(self, key)
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return any(item.name == key for item in self)
+        return list.__contains__(self, key)
+
+
+def _fake_mesh(grid=4):
+    ns = types.SimpleNamespace
+    vertices = _Collection()
+    for i in range(grid * grid):
+        x, y = divmod(i, grid)
+        groups = [ns(group=g, weight=1.0 / (g + 1)) for g in range(i % 3)]
+        co = (float(x), float(y), 0.0)
+        vertices.append(
+            ns(index=i, undeformed_co=co, co=co, normal=(0.0, 0.0, 1.0), groups=groups)
+        )
+    polygons, loops, uvs, colors = (_Collection() for _ in range(4))
+    for x in range(grid - 1):
+        for y in range(grid - 1):
+            a, b = x * grid + y, x * grid + y + 1
+            c, d = (x + 1) * grid + y + 1, (x + 1) * grid + y
+            for triangle in ((a, b, c), (a, c, d)):
+                polygons.append(
+                    ns(index=len(polygons), loop_start=len(loops), loop_total=3)
+                )
+                for v in triangle:
+                    loops.append(
+                        ns(
+                            index=len(loops),
+                            vertex_index=v,
+                            normal=(0.0, 0.0, 1.0),
+                            tangent=(1.0, 0.0, 0.0),
+                            bitangent_sign=1.0,
+                        )
+                    )
+                    uvs.append(ns(uv=(vertices[v].co[0] / grid, vertices[v].co[1])))
+                    colors.append(ns(color=(1.0, 0.5, 0.0, 1.0)))
+
+    return ns(
+        vertices=vertices,
+        polygons=polygons,
+        loops=loops,
+        uv_layers=_Collection([ns(name="TEXCOORD.xy", data=uvs)]),
+        vertex_colors=_Collection([ns(name="COLOR", data=colors)]),
+        vertex_layers_float={},
+        vertex_layers_int={},
+        attributes={},
+        calc_tangents=lambda: None,
+    )
+
+
+def _element(name, fmt, slot, offset):
+    return {
+        "SemanticName": name,
+        "SemanticIndex": 0,
+        "Format": fmt,
+        "InputSlot": slot,
+        "AlignedByteOffset": offset,
+        "InputSlotClass": "per-vertex",
+        "InstanceDataStepRate": 0,
+    }
+
+
+def _export(export_ops, tmp_path, topology):
+    mesh = _fake_mesh()
+
+    class Obj(dict):
+        vertex_groups = _Collection(
+            types.SimpleNamespace(name=f"g{i}") for i in range(3)
+        )
+
+        def evaluated_get(self, depsgraph):
+            return self
+
+        def to_mesh(self):
+            return mesh
+
+    obj = Obj(
+        {
+            "3DMigoto:VBLayout": [
+                _element("POSITION", "R32G32B32_FLOAT", 0, 0),
+                _element("NORMAL", "R32G32B32_FLOAT", 0, 12),
+                _element("TANGENT", "R32G32B32A32_FLOAT", 0, 24),
+                _element("BLENDWEIGHT", "R32G32B32A32_FLOAT", 1, 0),
+                _element("BLENDINDICES", "R32G32B32A32_UINT", 1, 16),
+                _element("COLOR", "R8G8B8A8_UNORM", 2, 0),
+                _element("TEXCOORD", "R32G32_FLOAT", 2, 4),
+            ],
+            "3DMigoto:VB0Stride": 40,
+            "3DMigoto:VB1Stride": 32,
+            "3DMigoto:VB2Stride": 12,
+            "3DMigoto:IBFormat": "DXGI_FORMAT_R32_UINT",
+            "3DMigoto:Topology": topology,
+        }
+    )
+    context = types.SimpleNamespace(object=obj, evaluated_depsgraph_get=lambda: None)
+    operator = types.SimpleNamespace(
+        flip_normal=False,
+        flip_tangent=False,
+        flip_winding=False,
+        compress_indices=False,
+        report=lambda level, message: None,
+    )
+    vb_path = tmp_path / "mesh.vb"
+    export_ops.export_3dmigoto(
+        operator,
+        context,
+        vb_path,
+        vb_path.with_suffix(".ib"),
+        vb_path.with_suffix(".fmt"),
+        None,
+    )
+    return mesh
+
+
+def test_export_trianglelist(export_ops, tmp_path):
+    mesh = _export(export_ops, tmp_path, "trianglelist")
+
+    ib_data = (tmp_path / "mesh.ib").read_bytes()
+    indices = struct.unpack(f"<{len(ib_data) // 4}I", ib_data)
+    assert len(indices) == len(mesh.loops)
+    # Every loop of the fake mesh shares its attributes with the other loops of
+    # its vertex, so deduplication has to give exactly one VB entry per vertex
+    vertex_count = len(mesh.vertices)
+    assert sorted(set(indices)) == list(range(vertex_count))
+    assert (tmp_path / "mesh.vb0").stat().st_size == vertex_count * 40
+    assert (tmp_path / "mesh.vb1").stat().st_size == vertex_count * 32
+    assert (tmp_path / "mesh.vb2").stat().st_size == vertex_count * 12
+    assert (tmp_path / "mesh.fmt").stat().st_size > 0
+
+
+def test_export_pointlist(export_ops, tmp_path):
+    mesh = _export(export_ops, tmp_path, "pointlist")
+
+    vertex_count = len(mesh.vertices)
+    ib_data = (tmp_path / "mesh.ib").read_bytes()
+    assert struct.unpack(f"<{vertex_count}I", ib_data) == tuple(range(vertex_count))
+    vb0 = numpy.frombuffer((tmp_path / "mesh.vb0").read_bytes(), numpy.float32)
+    positions = vb0.reshape(vertex_count, 10)[:, 0:3]
+    expected = [list(vertex.undeformed_co) for vertex in mesh.vertices]
+    assert positions.tolist() == expected